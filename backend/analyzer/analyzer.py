@@ -1,10 +1,62 @@
 import ast
-from typing import Any, Dict
+import asyncio
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from .llm import generate_feedback
-from .models import AnalyzeResponse
+import httpx
+
+from .batching import FeedbackBatcher
+from .llm import FeedbackRequest, generate_feedback, generate_feedback_async, generate_feedback_stream
 from .static_checks import run_static_checks
 
+_RESPONSE_CACHE_SIZE = 256
+_RESPONSE_CACHE: "OrderedDict[tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def _source_digest(source: str) -> bytes:
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=16).digest()
+
+
+def _response_cache_key(
+    source: str,
+    hint_level: int,
+    help_mode: str,
+    include_complexity: bool,
+    include_solution: bool,
+) -> tuple:
+    return (_source_digest(source), hint_level, help_mode, include_complexity, include_solution)
+
+
+def _cached_response(key: tuple) -> Optional[Dict[str, Any]]:
+    # CACHE_TTL_SECONDS <= 0 (the default) keeps entries until they are evicted.
+    ttl = float(os.getenv("CACHE_TTL_SECONDS", "0"))
+    with _response_cache_lock:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if ttl > 0 and time.monotonic() - stored_at > ttl:
+            del _RESPONSE_CACHE[key]
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+    return copy.deepcopy(response)
+
+
+def _store_response(key: tuple, response: Dict[str, Any]) -> None:
+    # Only called for model-backed responses; a fallback is not worth pinning for an identical resubmission.
+    entry = (time.monotonic(), copy.deepcopy(response))
+    with _response_cache_lock:
+        _RESPONSE_CACHE[key] = entry
+        _RESPONSE_CACHE.move_to_end(key)
+        if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
 
 def _normalize_clusters(clusters: list[dict]) -> list[dict]:
     for cluster in clusters:
@@ -13,6 +65,65 @@ def _normalize_clusters(clusters: list[dict]) -> list[dict]:
     return clusters
 
 
+def _empty_response() -> Dict[str, Any]:
+    return {
+        "summary": "No code provided. Paste Python code first.",
+        "error_clusters": [],
+        "hints": [],
+        "full_solution": None,
+        "key_concepts": ["Code entry point", "Begin by writing one valid statement"],
+        "complexity": None,
+        "best_practices": ["Start with small, runnable snippets."],
+    }
+
+
+def run_static_and_parse(source: str) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+    """CPU-bound part of an analysis: parse and statically check the code.
+
+    Returns the issues found and the complexity estimate (None when the code does not parse).
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as exc:
+        issue = {
+            "type": "SyntaxError",
+            "line": exc.lineno or 0,
+            "snippet": exc.text.strip() if exc.text else None,
+            "why": exc.msg,
+            "severity": "error",
+        }
+        return [issue], None
+
+    static_context = run_static_checks(source, tree=tree)
+    return static_context.get("issues") or [], static_context.get("complexity")
+
+
+def _build_response(
+    feedback: Dict[str, Any],
+    issues: List[Dict[str, Any]],
+    help_mode: str,
+    include_complexity: bool,
+) -> Dict[str, Any]:
+    if help_mode == "diagnostic":
+        # People in diagnostic mode want quick checks, not guided tutoring.
+        feedback["hints"] = []
+        feedback["full_solution"] = None
+        feedback.pop("best_practices", None)
+        feedback.pop("key_concepts", None)
+
+    # Keep static issues the source of truth. If model returns different clusters, merge safely.
+    # Plain dict on purpose: the shape matches AnalyzeResponse, which the route uses as its schema.
+    return {
+        "summary": feedback.get("summary", "Analysis completed."),
+        "error_clusters": _normalize_clusters(issues if issues else feedback.get("error_clusters", [])),
+        "hints": feedback.get("hints", []),
+        "full_solution": feedback.get("full_solution"),
+        "key_concepts": feedback.get("key_concepts", []),
+        "complexity": feedback.get("complexity") if include_complexity else None,
+        "best_practices": feedback.get("best_practices", []),
+    }
+
+
 def analyze_python_code(
     code: str,
     hint_level: int,
@@ -22,45 +133,19 @@ def analyze_python_code(
 ) -> Dict[str, Any]:
     source = (code or "").strip()
     if not source:
-        return AnalyzeResponse(
-            summary="No code provided. Paste Python code first.",
-            error_clusters=[],
-            hints=[],
-            key_concepts=["Code entry point", "Begin by writing one valid statement"],
-            best_practices=["Start with small, runnable snippets."],
-            full_solution=None,
-        ).model_dump()
-
-    issues = []
-    syntax_ok = True
-    tree = None
+        return _empty_response()
 
-    try:
-        tree = ast.parse(source)
-    except SyntaxError as exc:
-        syntax_ok = False
-        issues.append(
-            {
-                "type": "SyntaxError",
-                "line": exc.lineno or 0,
-                "snippet": exc.text.strip() if exc.text else None,
-                "why": exc.msg,
-                "severity": "error",
-            }
-        )
-
-    static_context = {"issues": [], "complexity": None}
-    if syntax_ok and tree is not None:
-        static_context = run_static_checks(source)
-        issues = static_context.get("issues", [])
-        if not issues:
-            issues = []
+    # Identical resubmissions skip both the static checks and the Gemini round trip.
+    cache_key = _response_cache_key(source, hint_level, help_mode, include_complexity, include_solution)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        return cached
 
-    complexity = static_context.get("complexity")
+    issues, complexity = run_static_and_parse(source)
     if not include_complexity:
         complexity = None
 
-    feedback = generate_feedback(
+    feedback, from_model = generate_feedback(
         source,
         issues,
         hint_level=hint_level,
@@ -68,22 +153,118 @@ def analyze_python_code(
         include_solution=include_solution and help_mode == "guided",
         complexity=complexity,
     )
+    response = _build_response(feedback, issues, help_mode, include_complexity)
+    if from_model:
+        _store_response(cache_key, response)
+    return response
 
-    if help_mode == "diagnostic":
-        # People in diagnostic mode want quick checks, not guided tutoring.
-        feedback["hints"] = []
-        feedback["full_solution"] = None
-        feedback.pop("best_practices", None)
-        feedback.pop("key_concepts", None)
 
-    # Keep static issues the source of truth. If model returns different clusters, merge safely.
-    response = AnalyzeResponse(
-        summary=feedback.get("summary", "Analysis completed."),
-        error_clusters=_normalize_clusters(issues if issues else feedback.get("error_clusters", [])),
-        hints=feedback.get("hints", []),
-        full_solution=feedback.get("full_solution"),
-        key_concepts=feedback.get("key_concepts", []),
-        complexity=feedback.get("complexity") if include_complexity else None,
-        best_practices=feedback.get("best_practices", []),
-    )
-    return response.model_dump()
+async def analyze_python_code_async(
+    code: str,
+    hint_level: int,
+    help_mode: str,
+    include_complexity: bool,
+    include_solution: bool,
+    http: httpx.AsyncClient,
+    batcher: Optional[FeedbackBatcher] = None,
+) -> Dict[str, Any]:
+    """Same as analyze_python_code, without blocking the event loop.
+
+    Parsing and static checks run in a worker thread; the Gemini call goes through ``http``, or
+    through ``batcher`` when given so it can share a call with concurrent submissions.
+    """
+    source = (code or "").strip()
+    if not source:
+        return _empty_response()
+
+    cache_key = _response_cache_key(source, hint_level, help_mode, include_complexity, include_solution)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        return cached
+
+    issues, complexity = await asyncio.to_thread(run_static_and_parse, source)
+    if not include_complexity:
+        complexity = None
+
+    if batcher is not None:
+        feedback, from_model = await batcher.generate(
+            FeedbackRequest(
+                code=source,
+                issues=issues,
+                hint_level=hint_level,
+                include_complexity=include_complexity,
+                include_solution=include_solution and help_mode == "guided",
+                complexity=complexity,
+            )
+        )
+    else:
+        feedback, from_model = await generate_feedback_async(
+            source,
+            issues,
+            hint_level=hint_level,
+            include_complexity=include_complexity,
+            include_solution=include_solution and help_mode == "guided",
+            complexity=complexity,
+            http=http,
+        )
+    response = _build_response(feedback, issues, help_mode, include_complexity)
+    if from_model:
+        _store_response(cache_key, response)
+    return response
+
+
+async def stream_python_code_analysis(
+    code: str,
+    hint_level: int,
+    help_mode: str,
+    include_complexity: bool,
+    include_solution: bool,
+    http: httpx.AsyncClient,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Streaming variant of analyze_python_code_async, as (event, data) pairs.
+
+    Emits "static" with the static findings as soon as they are ready, "delta" for each fragment of
+    the model reply, and finally "result" with the same response analyze_python_code returns.
+
+    Deltas are the model's raw text, before the shape checks and the diagnostic-mode stripping that
+    "result" gets, so they are only sent in guided mode; diagnostic clients get "static" and "result".
+    """
+    source = (code or "").strip()
+    if not source:
+        yield "result", _empty_response()
+        return
+
+    cache_key = _response_cache_key(source, hint_level, help_mode, include_complexity, include_solution)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        # Keep the event sequence clients rely on: static findings first, then the answer.
+        yield "static", {"error_clusters": cached["error_clusters"], "complexity": cached["complexity"]}
+        yield "result", cached
+        return
+
+    issues, complexity = await asyncio.to_thread(run_static_and_parse, source)
+    if not include_complexity:
+        complexity = None
+    yield "static", {"error_clusters": _normalize_clusters(issues), "complexity": complexity}
+
+    feedback: Dict[str, Any] = {}
+    from_model = False
+    async for event, data in generate_feedback_stream(
+        source,
+        issues,
+        hint_level=hint_level,
+        include_complexity=include_complexity,
+        include_solution=include_solution and help_mode == "guided",
+        complexity=complexity,
+        http=http,
+    ):
+        if event == "delta":
+            if help_mode == "guided":
+                yield "delta", {"text": data}
+        else:
+            feedback, from_model = data
+
+    response = _build_response(feedback, issues, help_mode, include_complexity)
+    if from_model:
+        _store_response(cache_key, response)
+    yield "result", response
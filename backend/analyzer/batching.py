@@ -0,0 +1,132 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from .llm import FeedbackRequest, gemini_configured, generate_feedback_async, generate_feedback_batch
+
+
+@dataclass
+class _Pending:
+    request: FeedbackRequest
+    future: "asyncio.Future[Tuple[Dict[str, Any], bool]]"
+
+
+class FeedbackBatcher:
+    """Queue-backed worker that sends concurrent feedback requests to Gemini as one call.
+
+    A request that finds the queue otherwise empty goes out on its own straight away, so idle
+    periods pay no extra latency. When several are waiting, the worker waits ``window_seconds`` for
+    the rest of the burst and sends up to ``max_batch`` of them (within ``max_prompt_chars``) together.
+    Requests asking for a full solution (every guided-mode request) always go out on their own: their
+    replies are long enough to crowd out the rest of a shared one.
+
+    Batched submissions from different students share a single prompt. They are delimited with
+    unguessable ids (see generate_feedback_batch), but code in one submission can still try to
+    influence the feedback given for the others. Batching is therefore opt-in: the default
+    ``max_batch=1`` keeps every request on its own call.
+    """
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        window_seconds: float = 0.05,
+        max_batch: int = 1,
+        max_prompt_chars: int = 60000,
+    ):
+        self._http = http
+        self._window = window_seconds
+        self._max_batch = max_batch
+        self._max_prompt_chars = max_prompt_chars
+        self._queue: "asyncio.Queue[_Pending]" = asyncio.Queue()
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._in_flight: Set["asyncio.Task[None]"] = set()
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        tasks = list(self._in_flight)
+        if self._worker is not None:
+            tasks.append(self._worker)
+            self._worker = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+
+    async def generate(self, request: FeedbackRequest) -> Tuple[Dict[str, Any], bool]:
+        """Same result as generate_feedback_async for ``request``, possibly answered as part of a batch."""
+        if self._worker is None or self._max_batch <= 1 or request.include_solution or not gemini_configured():
+            return await self._generate_one(request)
+        future: "asyncio.Future[Tuple[Dict[str, Any], bool]]" = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(request, future))
+        return await future
+
+    async def _generate_one(self, request: FeedbackRequest) -> Tuple[Dict[str, Any], bool]:
+        return await generate_feedback_async(
+            request.code,
+            request.issues,
+            hint_level=request.hint_level,
+            include_complexity=request.include_complexity,
+            include_solution=request.include_solution,
+            complexity=request.complexity,
+            http=self._http,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            if not self._queue.empty():
+                # A burst is in progress: give the rest of it one window to arrive, then drain.
+                await asyncio.sleep(self._window)
+                prompt_chars = len(first.request.code)
+                while len(batch) < self._max_batch and not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if prompt_chars + len(item.request.code) > self._max_prompt_chars:
+                        # Too big to share this prompt; send it on its own instead of holding it back.
+                        self._dispatch([item])
+                        continue
+                    prompt_chars += len(item.request.code)
+                    batch.append(item)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[_Pending]) -> None:
+        # Batches run as their own tasks so a slow Gemini call never holds up the queue.
+        task = asyncio.create_task(self._answer(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _answer(self, batch: List[_Pending]) -> None:
+        outcomes: List[Any]
+        try:
+            if len(batch) == 1:
+                outcomes = list(await asyncio.gather(self._generate_one(batch[0].request), return_exceptions=True))
+            else:
+                outcomes = await self._answer_batch(batch)
+        except asyncio.CancelledError:
+            for pending in batch:
+                pending.future.cancel()
+            raise
+
+        for pending, outcome in zip(batch, outcomes):
+            # The caller may have gone away (client disconnect cancels its await).
+            if pending.future.done():
+                continue
+            if isinstance(outcome, BaseException):
+                pending.future.set_exception(outcome)
+            else:
+                pending.future.set_result(outcome)
+
+    async def _answer_batch(self, batch: List[_Pending]) -> List[Any]:
+        try:
+            return list(await generate_feedback_batch([p.request for p in batch], self._http))
+        except Exception:
+            # Whatever broke the shared call should not fail every member; answer each on its own.
+            return list(
+                await asyncio.gather(*(self._generate_one(p.request) for p in batch), return_exceptions=True)
+            )
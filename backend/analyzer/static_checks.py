@@ -1,7 +1,14 @@
 import ast
 import builtins
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, ClassVar, Dict, FrozenSet, List, Optional, Set, Union
+
+_BUILTIN_NAMES: FrozenSet[str] = frozenset(dir(builtins)) | frozenset(("None", "True", "False"))
+
+_DIV_OPS: FrozenSet[type] = frozenset((ast.Div, ast.FloorDiv, ast.Mod))
+_EQ_OPS: FrozenSet[type] = frozenset((ast.Eq, ast.NotEq))
+
+# Time complexity estimate indexed by maximum loop depth; deeper nesting falls through to O(n^k).
+_TIME_COMPLEXITY = ("Roughly O(n)", "Roughly O(n)", "Approximately O(n^2)")
 
 
 def _get_name(node: ast.AST) -> Optional[str]:
@@ -10,84 +17,157 @@ def _get_name(node: ast.AST) -> Optional[str]:
     return None
 
 
-def _add_target_names(target: ast.AST, names: Set[str]) -> None:
+def _add_target_names(target: ast.AST, define: Callable[[str], None]) -> None:
     if isinstance(target, ast.Name):
-        names.add(target.id)
+        define(target.id)
     elif isinstance(target, (ast.Tuple, ast.List)):
         for elt in target.elts:
-            _add_target_names(elt, names)
+            _add_target_names(elt, define)
     elif isinstance(target, ast.ExceptHandler):
         if target.name:
-            names.add(target.name)
+            define(target.name)
     elif isinstance(target, ast.Starred):
-        _add_target_names(target.value, names)
+        _add_target_names(target.value, define)
 
 
-@dataclass
-class RuntimeIssue:
-    type: str
-    line: Optional[int]
-    snippet: Optional[str]
-    why: str
-    severity: str = "warning"
+class FusedAnalysisVisitor(ast.NodeVisitor):
+    """Single pass over the tree for undefined names, runtime pitfalls and complexity signals."""
 
-
-class UndefinedNameVisitor(ast.NodeVisitor):
-    """Simple static heuristic for likely undefined variables."""
+    # Node class -> visit method, so dispatch skips building "visit_<Class>" and getattr per node.
+    _dispatch: ClassVar[Dict[type, Callable[[Any, ast.AST], Any]]] = {}
 
     def __init__(self, source: str):
         self.source = source
-        self.scopes: List[Set[str]] = [set()]
-        self.issues: List[RuntimeIssue] = []
-        runtime_builtins = set()
-        runtime_builtins.update(dir(builtins))
-        if isinstance(__builtins__, dict):
-            runtime_builtins.update(__builtins__.keys())
-        else:
-            runtime_builtins.update(dir(__builtins__))
-        self.builtins = runtime_builtins
-        self._seen: Set[Tuple[str, Optional[int]]] = set()
+        # Column offsets are UTF-8 byte offsets and ast also splits on bare "\r", so the
+        # cached lines are only used for the plain "\n" case.
+        self._lines: Optional[List[str]] = source.split("\n") if "\r" not in source else None
+        # Union of every open scope, plus the names each scope added to it, so a lookup is one set hit.
+        self._visible: Set[str] = set()
+        self._scope_stack: List[Set[str]] = [set()]
+        self.builtins = _BUILTIN_NAMES
+        # Each undefined name is reported once per file, at its first use.
+        self._seen: Set[str] = set()
+        # Parts of the tree the name check never looked at (call targets, defaults, annotations...)
+        # are still walked for runtime and complexity signals, just with name reporting off.
+        self._check_names = True
+        # Decorators are walked twice: for names where the name check always looked at them, and for
+        # runtime pitfalls after the body, where NodeVisitor's field order puts them.
+        self._check_runtime = True
+        self.undefined_issues: List[Dict[str, Any]] = []
+        self.runtime_issues: List[Dict[str, Any]] = []
+
+        self.loop_depth = 0
+        self.max_loop_depth = 0
+        self.has_nested_data = False
+        self.has_recursion = False
+        self._func_stack: List[str] = []
+
+    @property
+    def issues(self) -> List[Dict[str, Any]]:
+        return self.undefined_issues + self.runtime_issues
+
+    # Scope tracking
 
     def _push_scope(self) -> None:
-        self.scopes.append(set())
+        self._scope_stack.append(set())
 
     def _pop_scope(self) -> None:
-        if len(self.scopes) > 1:
-            self.scopes.pop()
+        if len(self._scope_stack) > 1:
+            self._visible.difference_update(self._scope_stack.pop())
 
     def _is_defined(self, name: str) -> bool:
-        return any(name in scope for scope in reversed(self.scopes))
+        return name in self._visible
 
     def _define(self, name: str) -> None:
-        if name and not name.startswith("_"):
-            self.scopes[-1].add(name)
-        elif name:
-            # Keep underscore-prefixed names visible as local symbols.
-            self.scopes[-1].add(name)
+        # Underscore-prefixed names are kept visible as local symbols too.
+        if name and name not in self._visible:
+            self._visible.add(name)
+            self._scope_stack[-1].add(name)
+
+    def _visit_unchecked(self, node: Optional[ast.AST]) -> None:
+        if node is None:
+            return
+        previous = self._check_names
+        self._check_names = False
+        self.visit(node)
+        self._check_names = previous
+
+    def _visit_names_only(self, node: ast.AST) -> None:
+        previous = self._check_runtime
+        self._check_runtime = False
+        self.visit(node)
+        self._check_runtime = previous
+
+    def _snippet(self, node: ast.expr) -> Optional[str]:
+        lineno = node.lineno
+        if self._lines is not None and node.end_lineno == lineno and 0 < lineno <= len(self._lines):
+            line = self._lines[lineno - 1]
+            if line.isascii():
+                return line[node.col_offset : node.end_col_offset]
+        return ast.get_source_segment(self.source, node)
 
     def _report_undefined(self, node: ast.Name) -> None:
-        if node.id in self.builtins or node.id in {"None", "True", "False"}:
+        if node.id in _BUILTIN_NAMES:
             return
         if self._is_defined(node.id):
             return
-        key = (node.id, node.lineno)
-        if key in self._seen:
+        if node.id in self._seen:
             return
-        self._seen.add(key)
-        self.issues.append(
-            RuntimeIssue(
-                type="Potential issue",
-                line=node.lineno,
-                snippet=ast.get_source_segment(self.source, node),
-                why=f"Variable '{node.id}' might not be defined before it is used.",
-            )
+        self._seen.add(node.id)
+        self.undefined_issues.append(
+            {
+                "type": "Potential issue",
+                "line": node.lineno,
+                "snippet": self._snippet(node),
+                "why": f"Variable '{node.id}' might not be defined before it is used.",
+                "severity": "warning",
+            }
         )
 
+    # Loop depth tracking
+
+    def _enter_loop(self) -> None:
+        self.loop_depth += 1
+        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
+
+    def _exit_loop(self) -> None:
+        self.loop_depth -= 1
+
+    # Dispatch
+
+    def visit(self, node: ast.AST) -> Any:
+        cls = node.__class__
+        method = self._dispatch.get(cls)
+        if method is None:
+            found: Callable[[Any, ast.AST], Any] = getattr(type(self), "visit_" + cls.__name__, type(self).generic_visit)
+            self._dispatch[cls] = found
+            return found(self, node)
+        return method(self, node)
+
+    def generic_visit(self, node: ast.AST) -> Any:
+        # Same walk as NodeVisitor.generic_visit, but field-less leaves (Load, Store, operators)
+        # are skipped instead of being dispatched just to do nothing.
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST) and item._fields:
+                        self.visit(item)
+            elif isinstance(value, ast.AST) and value._fields:
+                self.visit(value)
+
+    # Visitors
+
     def visit_Name(self, node: ast.Name) -> Any:
-        if isinstance(node.ctx, ast.Load):
+        if self._check_names and type(node.ctx) is ast.Load:
             self._report_undefined(node)
         return self.generic_visit(node)
 
+    def visit_Call(self, node: ast.Call) -> Any:
+        if isinstance(node.func, ast.Name) and node.func.id in self._func_stack:
+            self.has_recursion = True
+        return self.generic_visit(node)
+
     def visit_Import(self, node: ast.Import) -> Any:
         for alias in node.names:
             name = alias.asname or alias.name.split(".")[0]
@@ -103,8 +183,10 @@ class UndefinedNameVisitor(ast.NodeVisitor):
             self._define(name)
         return self.generic_visit(node)
 
-    def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
+    def visit_FunctionDef(self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> Any:
         self._define(node.name)
+        self._func_stack.append(node.name)
+        self._visit_unchecked(node.args)
         self._push_scope()
         for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
             if arg.arg:
@@ -114,9 +196,13 @@ class UndefinedNameVisitor(ast.NodeVisitor):
         if node.args.kwarg and node.args.kwarg.arg:
             self._define(node.args.kwarg.arg)
         for deco in node.decorator_list:
-            self.visit(deco)
+            self._visit_names_only(deco)
         self._add_function_body(node)
         self._pop_scope()
+        for deco in node.decorator_list:
+            self._visit_unchecked(deco)
+        self._visit_unchecked(node.returns)
+        self._func_stack.pop()
         return node
 
     def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> Any:
@@ -127,57 +213,81 @@ class UndefinedNameVisitor(ast.NodeVisitor):
         self._push_scope()
         for base in node.bases:
             self.visit(base)
+        for keyword in node.keywords:
+            self._visit_unchecked(keyword)
         for deco in node.decorator_list:
-            self.visit(deco)
+            self._visit_names_only(deco)
         self._add_function_body(node)
         self._pop_scope()
+        for deco in node.decorator_list:
+            self._visit_unchecked(deco)
         return node
 
     def visit_For(self, node: ast.For) -> Any:
+        if self._check_runtime and isinstance(node.iter, ast.Constant) and isinstance(node.iter.value, int):
+            self.runtime_issues.append(
+                {
+                    "type": "TypeError",
+                    "line": node.iter.lineno,
+                    "snippet": self._snippet(node.iter),
+                    "why": "You are trying to iterate over an int, which is not iterable.",
+                    "severity": "warning",
+                }
+            )
+        self._enter_loop()
+        self._visit_unchecked(node.target)
         self.visit(node.iter)
-        _add_target_names(node.target, self.scopes[-1])
+        _add_target_names(node.target, self._define)
         for stmt in node.body:
             self.visit(stmt)
         for stmt in node.orelse:
             self.visit(stmt)
+        self._exit_loop()
         return node
 
     def visit_While(self, node: ast.While) -> Any:
+        self._enter_loop()
         self.visit(node.test)
         for stmt in node.body:
             self.visit(stmt)
         for stmt in node.orelse:
             self.visit(stmt)
+        self._exit_loop()
         return node
 
     def visit_With(self, node: ast.With) -> Any:
         for item in node.items:
             self.visit(item.context_expr)
             if item.optional_vars:
-                _add_target_names(item.optional_vars, self.scopes[-1])
+                self._visit_unchecked(item.optional_vars)
+                _add_target_names(item.optional_vars, self._define)
         for stmt in node.body:
             self.visit(stmt)
         return node
 
     def visit_Assign(self, node: ast.Assign) -> Any:
         for target in node.targets:
-            _add_target_names(target, self.scopes[-1])
+            self._visit_unchecked(target)
+            _add_target_names(target, self._define)
         self.visit(node.value)
         return node
 
     def visit_AnnAssign(self, node: ast.AnnAssign) -> Any:
-        _add_target_names(node.target, self.scopes[-1])
+        self._visit_unchecked(node.target)
+        _add_target_names(node.target, self._define)
         self.visit(node.annotation)
         if node.value:
             self.visit(node.value)
         return node
 
     def visit_AugAssign(self, node: ast.AugAssign) -> Any:
-        _add_target_names(node.target, self.scopes[-1])
+        self._visit_unchecked(node.target)
+        _add_target_names(node.target, self._define)
         self.visit(node.value)
         return node
 
     def visit_ExceptHandler(self, node: ast.ExceptHandler) -> Any:
+        self._visit_unchecked(node.type)
         self._push_scope()
         if node.name:
             self._define(node.name)
@@ -186,150 +296,74 @@ class UndefinedNameVisitor(ast.NodeVisitor):
         self._pop_scope()
         return node
 
-    def _add_function_body(self, node: Any) -> None:
-        for stmt in getattr(node, "body", []):
-            self.visit(stmt)
-
-
-class RuntimePatternVisitor(ast.NodeVisitor):
-    """Heuristics for obvious runtime pitfalls."""
-
-    def __init__(self, source: str):
-        self.source = source
-        self.issues: List[RuntimeIssue] = []
-
     def visit_BinOp(self, node: ast.BinOp) -> Any:
-        if isinstance(node.op, (ast.Div, ast.FloorDiv, ast.Mod)):
+        if self._check_runtime and type(node.op) in _DIV_OPS:
             if self._is_constant_zero(node.right):
-                self.issues.append(
-                    RuntimeIssue(
-                        type="ZeroDivisionError",
-                        line=node.lineno,
-                        snippet=ast.get_source_segment(self.source, node),
-                        why="This expression can divide by zero.",
-                    )
+                self.runtime_issues.append(
+                    {
+                        "type": "ZeroDivisionError",
+                        "line": node.lineno,
+                        "snippet": self._snippet(node),
+                        "why": "This expression can divide by zero.",
+                        "severity": "warning",
+                    }
                 )
         self.generic_visit(node)
 
-    def visit_For(self, node: ast.For) -> Any:
-        if isinstance(node.iter, ast.Constant) and isinstance(node.iter.value, int):
-            self.issues.append(
-                RuntimeIssue(
-                    type="TypeError",
-                    line=node.iter.lineno,
-                    snippet=ast.get_source_segment(self.source, node.iter),
-                    why="You are trying to iterate over an int, which is not iterable.",
-                )
-            )
-        self.generic_visit(node)
-
     def visit_Compare(self, node: ast.Compare) -> Any:
         # Beginner-friendly nudge for 'is None' vs '==' mistakes.
-        if len(node.ops) == 1 and isinstance(node.ops[0], (ast.Eq, ast.NotEq)):
+        if self._check_runtime and len(node.ops) == 1 and type(node.ops[0]) in _EQ_OPS:
             comp_rhs = node.comparators[0]
             if isinstance(comp_rhs, ast.Constant) and comp_rhs.value is None:
-                self.issues.append(
-                    RuntimeIssue(
-                        type="BestPractice",
-                        line=node.lineno,
-                        snippet=ast.get_source_segment(self.source, node),
-                        why="Use `is None` / `is not None` for None checks.",
-                        severity="info",
-                    )
+                self.runtime_issues.append(
+                    {
+                        "type": "BestPractice",
+                        "line": node.lineno,
+                        "snippet": self._snippet(node),
+                        "why": "Use `is None` / `is not None` for None checks.",
+                        "severity": "info",
+                    }
                 )
         self.generic_visit(node)
 
+    def _add_function_body(self, node: Any) -> None:
+        for stmt in getattr(node, "body", []):
+            self.visit(stmt)
+
     @staticmethod
     def _is_constant_zero(node: ast.AST) -> bool:
         return isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and node.value == 0
 
 
-class ComplexityVisitor(ast.NodeVisitor):
-    def __init__(self):
-        self.loop_depth = 0
-        self.max_loop_depth = 0
-        self.has_nested_data = False
-        self.has_recursion = False
-        self.function_name: Optional[str] = None
-
-    def visit_For(self, node: ast.For) -> Any:
-        self.loop_depth += 1
-        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
-        self.generic_visit(node)
-        self.loop_depth -= 1
-
-    def visit_While(self, node: ast.While) -> Any:
-        self.loop_depth += 1
-        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
-        self.generic_visit(node)
-        self.loop_depth -= 1
-
-    def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
-        previous = self.function_name
-        self.function_name = node.name
-        self._check_recursion(node)
-        self.generic_visit(node)
-        self.function_name = previous
-
-    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> Any:
-        self.visit_FunctionDef(node)
-
-    def _check_recursion(self, node: ast.AST) -> None:
-        fn = self.function_name
-        for child in ast.walk(node):
-            if isinstance(child, ast.Call) and isinstance(child.func, ast.Name) and child.func.id == fn:
-                self.has_recursion = True
-
-
-def run_static_checks(source: str) -> Dict[str, Any]:
-    tree = ast.parse(source)
-    issues: List[RuntimeIssue] = []
-
-    undefined_checker = UndefinedNameVisitor(source)
-    undefined_checker.visit(tree)
-    issues.extend(undefined_checker.issues)
-
-    runtime_checker = RuntimePatternVisitor(source)
-    runtime_checker.visit(tree)
-    issues.extend(runtime_checker.issues)
-
-    complexity_checker = ComplexityVisitor()
-    complexity_checker.visit(tree)
+def run_static_checks(source: str, tree: Optional[ast.Module] = None) -> Dict[str, Any]:
+    if tree is None:
+        tree = ast.parse(source)
+    checker = FusedAnalysisVisitor(source)
+    checker.visit(tree)
+    issues = checker.issues
     complexity = {
-        "time": _derive_time_complexity(complexity_checker),
-        "space": _derive_space_complexity(complexity_checker),
+        "time": _derive_time_complexity(checker),
+        "space": _derive_space_complexity(checker),
     }
 
     return {
-        "issues": [
-            {
-                "type": issue.type,
-                "line": issue.line,
-                "snippet": issue.snippet,
-                "why": issue.why,
-                "severity": issue.severity,
-            }
-            for issue in issues
-        ],
+        "issues": issues,
         "complexity": complexity,
-        "recursion": complexity_checker.has_recursion,
-        "max_loop_depth": complexity_checker.max_loop_depth,
+        "recursion": checker.has_recursion,
+        "max_loop_depth": checker.max_loop_depth,
     }
 
 
-def _derive_time_complexity(complexity_checker: ComplexityVisitor) -> str:
+def _derive_time_complexity(complexity_checker: FusedAnalysisVisitor) -> str:
     if complexity_checker.has_recursion:
         return "Depends on recursion depth; often O(2^n) for naive recursion"
-    if complexity_checker.max_loop_depth == 0:
-        return "Roughly O(n)"
-    if complexity_checker.max_loop_depth == 1:
-        return "Roughly O(n)"
-    if complexity_checker.max_loop_depth == 2:
-        return "Approximately O(n^2)"
+    depth = complexity_checker.max_loop_depth
+    if depth < len(_TIME_COMPLEXITY):
+        return _TIME_COMPLEXITY[depth]
     return "Approximately O(n^k), k > 2"
 
 
-def _derive_space_complexity(complexity_checker: ComplexityVisitor) -> str:
+def _derive_space_complexity(complexity_checker: FusedAnalysisVisitor) -> str:
     if complexity_checker.has_recursion:
         return "O(recursion depth)"
     return "O(1) to O(n) typical for this file"
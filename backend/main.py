@@ -1,17 +1,90 @@
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple
 
+import httpx
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from analyzer.analyzer import analyze_python_code
-from analyzer.models import AnalyzeRequest
+from analyzer.analyzer import analyze_python_code_async, stream_python_code_analysis
+from analyzer.batching import FeedbackBatcher
+from analyzer.models import AnalyzeRequest, AnalyzeResponse
 
 load_dotenv()
 
 
-app = FastAPI(title="AI-Assisted Python Feedback API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # One pooled client for all Gemini calls, so requests share keep-alive connections.
+    app.state.http = httpx.AsyncClient(limits=httpx.Limits(max_connections=16, max_keepalive_connections=16))
+    # Opt-in: with GEMINI_BATCH_SIZE > 1, diagnostic submissions arriving together share one Gemini call.
+    app.state.batcher = FeedbackBatcher(
+        app.state.http,
+        window_seconds=int(os.getenv("GEMINI_BATCH_WINDOW_MS", "50")) / 1000,
+        max_batch=int(os.getenv("GEMINI_BATCH_SIZE", "1")),
+    )
+    app.state.batcher.start()
+    try:
+        yield
+    finally:
+        await app.state.batcher.close()
+        await app.state.http.aclose()
+
+
+app = FastAPI(
+    title="AI-Assisted Python Feedback API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# JSON.stringify escapes control characters as \uXXXX, so one code character is at most 6 body bytes.
+_MAX_BODY_BYTES_PER_CHAR = 6
+_BODY_ENVELOPE_BYTES = 1024
+
+
+def _max_code_chars() -> int:
+    return int(os.getenv("MAX_CODE_CHARS", "20000"))
+
+
+def _code_too_large(status_code: int, max_chars: int) -> ORJSONResponse:
+    return ORJSONResponse(
+        status_code=status_code,
+        content={
+            "detail": f"Code too large. Max allowed characters is {max_chars}.",
+        },
+    )
+
+
+class RejectOversizedBodies:
+    """Turn away huge payloads from Content-Length alone, before the JSON body is read and decoded.
+
+    Plain ASGI rather than @app.middleware("http"), so other responses (SSE streams included) pass
+    straight through without being wrapped.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] == "POST":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    max_chars = _max_code_chars()
+                    if value.isdigit() and int(value) > max_chars * _MAX_BODY_BYTES_PER_CHAR + _BODY_ENVELOPE_BYTES:
+                        await _code_too_large(413, max_chars)(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+# Added before CORS (so it runs inside it) so that rejections still carry CORS headers for the browser.
+app.add_middleware(RejectOversizedBodies)
+
 
 allowed = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000")
 allow_list = [origin.strip() for origin in allowed.split(",") if origin.strip()]
@@ -32,22 +105,43 @@ def healthcheck() -> dict:
     return {"status": "ok"}
 
 
-@app.post("/api/analyze")
-async def analyze(payload: AnalyzeRequest) -> JSONResponse:
-    max_chars = int(os.getenv("MAX_CODE_CHARS", "20000"))
+# Documented in OpenAPI only: the response is built as a plain dict and not validated against the
+# model here; llm._feedback_from_parsed keeps Gemini's fields to this shape.
+@app.post("/api/analyze", responses={200: {"model": AnalyzeResponse}})
+async def analyze(payload: AnalyzeRequest, request: Request) -> ORJSONResponse:
+    max_chars = _max_code_chars()
     if len(payload.code) > max_chars:
-        return JSONResponse(
-            status_code=400,
-            content={
-                "detail": f"Code too large. Max allowed characters is {max_chars}.",
-            },
-        )
-
-    result = analyze_python_code(
+        return _code_too_large(400, max_chars)
+
+    result = await analyze_python_code_async(
+        code=payload.code,
+        hint_level=payload.hint_depth or payload.hint_level or 1,
+        help_mode=payload.help_mode,
+        include_complexity=payload.include_complexity,
+        include_solution=payload.include_solution,
+        http=request.app.state.http,
+        batcher=request.app.state.batcher,
+    )
+    return ORJSONResponse(content=result)
+
+
+async def _sse(events: AsyncIterator[Tuple[str, dict]]) -> AsyncIterator[bytes]:
+    async for event, data in events:
+        yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+@app.post("/api/analyze/stream")
+async def analyze_stream(payload: AnalyzeRequest, request: Request) -> Response:
+    max_chars = _max_code_chars()
+    if len(payload.code) > max_chars:
+        return _code_too_large(400, max_chars)
+
+    events = stream_python_code_analysis(
         code=payload.code,
         hint_level=payload.hint_depth or payload.hint_level or 1,
         help_mode=payload.help_mode,
         include_complexity=payload.include_complexity,
         include_solution=payload.include_solution,
+        http=request.app.state.http,
     )
-    return JSONResponse(content=result)
+    return StreamingResponse(_sse(events), media_type="text/event-stream")
@@ -0,0 +1,16 @@
+"""Optional build step: compile the static checks into a C extension with mypyc.
+
+    pip install mypy setuptools
+    python setup.py build_ext --inplace
+
+The compiled module sits next to analyzer/static_checks.py and is imported in its place; delete the
+generated .so files to go back to the pure-Python version (and after editing static_checks.py).
+"""
+
+from mypyc.build import mypycify
+from setuptools import setup
+
+setup(
+    name="python-feedback-api-static-checks",
+    ext_modules=mypycify(["analyzer/static_checks.py"]),
+)